@@ -0,0 +1,112 @@
+import bcrypt
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import os
+import time
+
+# ============================================
+# CONFIGURACIÓN DE LA CALIBRACIÓN
+# ============================================
+PASSWORD_PRUEBA = "Calibracion123!"
+COSTO_MIN = 8
+COSTO_MAX = 14
+PRESUPUESTO_MS = 250       # p99 máximo aceptable para verificar un login
+MUESTRAS = 20              # Verificaciones por worker y nivel de concurrencia
+
+# ============================================
+# MEDICIÓN
+# ============================================
+def medir_checkpw(hashed, muestras):
+    """Latencias (ms) de `muestras` verificaciones consecutivas"""
+    password = PASSWORD_PRUEBA.encode("utf-8")
+    latencias = []
+    for _ in range(muestras):
+        inicio = time.perf_counter()
+        bcrypt.checkpw(password, hashed)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    return latencias
+
+def percentil(valores, p):
+    """Percentil p (0-100) por rango más cercano"""
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[indice]
+
+def medir_costo(costo, max_workers, muestras, factor):
+    """hashpw una vez y checkpw bajo 1..max_workers logins concurrentes"""
+    inicio = time.perf_counter()
+    hashed = bcrypt.hashpw(PASSWORD_PRUEBA.encode("utf-8"), bcrypt.gensalt(costo))
+    hashpw_ms = (time.perf_counter() - inicio) * 1000 * factor
+
+    por_concurrencia = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for concurrencia in range(1, max_workers + 1):
+            futuros = [executor.submit(medir_checkpw, hashed, muestras) for _ in range(concurrencia)]
+            latencias = [ms * factor for f in futuros for ms in f.result()]
+            por_concurrencia[concurrencia] = (percentil(latencias, 50), percentil(latencias, 99))
+    return hashpw_ms, por_concurrencia
+
+# ============================================
+# FUNCIÓN PRINCIPAL
+# ============================================
+def calibrar(costo_min, costo_max, max_workers, presupuesto_ms, muestras, factor):
+    print("=" * 60)
+    print("🔐 CALIBRACIÓN DEL COSTO BCRYPT")
+    print("=" * 60)
+    print(f"   • Costos {costo_min}..{costo_max} | 1..{max_workers} logins concurrentes | "
+          f"{muestras} muestras por worker")
+    print(f"   • Presupuesto: p99 de verificación ≤ {presupuesto_ms} ms"
+          + (f" | factor de escala ×{factor}" if factor != 1 else ""))
+    print()
+    print(f"{'costo':>5} {'hashpw':>9} " + " ".join(f"{f'p99@{c}':>9}" for c in range(1, max_workers + 1)))
+
+    recomendado = None
+    for costo in range(costo_min, costo_max + 1):
+        hashpw_ms, por_concurrencia = medir_costo(costo, max_workers, muestras, factor)
+        p99_peor = por_concurrencia[max_workers][1]
+        marca = "✅" if p99_peor <= presupuesto_ms else "❌"
+        print(f"{costo:>5} {hashpw_ms:>7.1f}ms "
+              + " ".join(f"{p99:>7.1f}ms" for _, p99 in por_concurrencia.values()) + f"  {marca}")
+        if p99_peor > presupuesto_ms:
+            break  # Costos más altos solo pueden ser más lentos
+        recomendado = costo
+
+    print()
+    if recomendado is None:
+        print(f"❌ Ningún costo ≥ {costo_min} cumple el presupuesto con {max_workers} logins concurrentes")
+    else:
+        print(f"🎯 Costo recomendado: {recomendado}")
+        print(f"   python crear-admin.py --costo {recomendado}")
+    return recomendado
+
+def parsear_argumentos():
+    """Leer opciones de línea de comandos"""
+    parser = argparse.ArgumentParser(
+        description="Recomienda el costo bcrypt más alto cuyo p99 de login cabe en el presupuesto"
+    )
+    parser.add_argument("--costo-min", type=int, default=COSTO_MIN,
+                        help=f"Costo inicial (por defecto {COSTO_MIN})")
+    parser.add_argument("--costo-max", type=int, default=COSTO_MAX,
+                        help=f"Costo final (por defecto {COSTO_MAX})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Logins concurrentes máximos a simular (por defecto el número de CPUs)")
+    parser.add_argument("--presupuesto-ms", type=float, default=PRESUPUESTO_MS,
+                        help=f"p99 máximo de verificación en ms (por defecto {PRESUPUESTO_MS})")
+    parser.add_argument("--muestras", type=int, default=MUESTRAS,
+                        help=f"Verificaciones por worker y nivel (por defecto {MUESTRAS})")
+    parser.add_argument("--factor", type=float, default=1.0,
+                        help="Multiplicar las latencias medidas, p. ej. para estimar bcryptjs "
+                             "del backend a partir de la librería C (por defecto 1.0)")
+    args = parser.parse_args()
+    if not 4 <= args.costo_min <= args.costo_max <= 31:
+        parser.error("Se requiere 4 <= --costo-min <= --costo-max <= 31")
+    if args.workers < 1 or args.muestras < 1 or args.factor <= 0:
+        parser.error("--workers, --muestras y --factor deben ser positivos")
+    return args
+
+# ============================================
+# EJECUCIÓN
+# ============================================
+if __name__ == "__main__":
+    args = parsear_argumentos()
+    calibrar(args.costo_min, args.costo_max, args.workers, args.presupuesto_ms, args.muestras, args.factor)
@@ -1,5 +1,15 @@
 import requests
+from requests.adapters import HTTPAdapter
+import argparse
+import hashlib
+import itertools
+import json
 import os
+import random
+import re
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import time
 
@@ -14,21 +24,239 @@ TOKEN = ""                 # (Opcional) Token de GitHub para evitar límites
 # ===============================
 # 🔗 URLs base
 # ===============================
-API_URL = f"https://api.github.com/repos/{USER}/{REPO}/branches/{BRANCH}"
+API_BASE = "https://api.github.com"
+API_URL = f"{API_BASE}/repos/{USER}/{REPO}/branches/{BRANCH}"
 RAW_BASE = f"https://raw.githubusercontent.com/{USER}/{REPO}/{BRANCH}/"
 
+# Checkout local para --local (el repositorio que contiene este script)
+REPO_LOCAL = os.path.dirname(os.path.abspath(__file__))
 
-def obtener_commit_mas_reciente():
-    """Obtiene el commit más reciente del branch."""
-    headers = {"Authorization": f"token {TOKEN}"} if TOKEN else {}
+# Caché de respuestas de la API con su ETag/Last-Modified (ver CacheHttp)
+RUTA_CACHE_HTTP = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache-http.json")
 
-    print("🔄 Verificando commit más reciente...")
-    res = requests.get(API_URL, headers=headers)
+# Reglas de clasificación (ver Clasificador)
+RUTA_REGLAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reglas-links.json")
+CATEGORIAS = ("backend", "frontend", "docs", "otros")
+
+# ===============================
+# 🌐 CLIENTE HTTP
+# ===============================
+TIMEOUT = (5, 30)                  # Segundos de conexión y de lectura por petición
+CONEXIONES_HTTP = 8                # Conexiones keep-alive por host
+REINTENTOS = 5                     # Reintentos ante errores de red, 5xx, 429 o límite agotado
+BACKOFF_BASE = 0.5                 # Backoff exponencial con jitter: U(0, min(MAX, BASE·2^intento))
+BACKOFF_MAX = 30
+ESPERA_MAXIMA_LIMITE = 15 * 60     # Tope de una espera (reinicio del límite o Retry-After); ver --espera-maxima
+FRACCION_RESERVA = 0.1             # Con menos de este % del límite, espaciar peticiones hasta el reinicio
+ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+HILOS_ARBOL = 8                    # Subárboles descargados a la vez si el árbol recursivo viene truncado
+
+
+class ClienteGitHub:
+    """requests.Session compartida con timeouts, reintentos y ritmo según el límite de la API.
+
+    Lee X-RateLimit-Remaining/Reset de cada respuesta: con el presupuesto casi
+    agotado reparte las peticiones restantes hasta el reinicio, y si se agotó
+    espera al reinicio en lugar de fallar con 403. Ninguna espera pedida por el
+    servidor pasa de `espera_maxima` segundos: si la supera, falla.
+    """
+
+    def __init__(self, token=TOKEN, dormir=time.sleep, espera_maxima=ESPERA_MAXIMA_LIMITE):
+        self.session = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=CONEXIONES_HTTP)
+        self.session.mount("https://", adaptador)
+        self.session.mount("http://", adaptador)
+        if token:
+            self.session.headers["Authorization"] = f"token {token}"
+        self.dormir = dormir
+        self.espera_maxima = espera_maxima
+        self.lock = threading.Lock()
+        self.limite = self.restantes = self.reinicio = None
+        self.tiempos = []
+        self.reintentos = 0
+        self.espera_limite = 0.0
+
+    def actualizar_limite(self, res):
+        restantes = res.headers.get("X-RateLimit-Remaining")
+        reinicio = res.headers.get("X-RateLimit-Reset")
+        if restantes is None or reinicio is None:
+            return
+        self.restantes = int(restantes)
+        self.reinicio = float(reinicio)
+        self.limite = int(res.headers.get("X-RateLimit-Limit", 0)) or None
+
+    def espera_por_limite(self):
+        """Segundos a esperar antes de la siguiente petición según el último límite visto."""
+        if self.restantes is None:
+            return 0
+        ventana = self.reinicio - time.time()
+        if ventana <= 0:
+            return 0
+        if self.restantes <= 0:
+            return ventana + 1
+        if self.limite and self.restantes < self.limite * FRACCION_RESERVA:
+            return ventana / self.restantes
+        return 0
+
+    def reintentable(self, res):
+        if res.status_code in ESTADOS_REINTENTABLES:
+            return True
+        # 403 por límite primario (Remaining: 0) o secundario (Retry-After)
+        return res.status_code == 403 and (res.headers.get("X-RateLimit-Remaining") == "0"
+                                           or "Retry-After" in res.headers)
+
+    def pausa(self, intento, res):
+        if res is not None and "Retry-After" in res.headers:
+            try:
+                espera = max(0.0, float(res.headers["Retry-After"]))
+            except ValueError:
+                espera = None  # Valor ilegible: se usa el backoff normal
+            if espera is not None:
+                if espera > self.espera_maxima:
+                    raise Exception(f"La API pide esperar {espera:.0f}s (Retry-After), más que el máximo "
+                                    f"de {self.espera_maxima:.0f}s; reintenta más tarde o sube --espera-maxima")
+                return espera
+        if res is not None and res.headers.get("X-RateLimit-Remaining") == "0":
+            return 0  # espera_por_limite() aguarda el reinicio
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** intento))
+
+    def get(self, url, headers=None):
+        """GET con reintentos; devuelve la última respuesta (o lanza si no hubo ninguna)."""
+        res, error = None, None
+        for intento in range(REINTENTOS + 1):
+            with self.lock:
+                espera = self.espera_por_limite()
+                if espera > self.espera_maxima:
+                    raise Exception(f"Límite de la API agotado hasta dentro de {espera:.0f}s, más que el "
+                                    f"máximo de {self.espera_maxima:.0f}s; configura TOKEN, usa --local "
+                                    "o sube --espera-maxima")
+                if espera:
+                    print(f"⏳ Límite de la API: esperando {espera:.1f}s ({self.restantes} restantes)")
+                    self.dormir(espera)
+                    self.espera_limite += espera
+
+            inicio = time.perf_counter()
+            try:
+                res, error = self.session.get(url, headers=headers, timeout=TIMEOUT), None
+            except (requests.ConnectionError, requests.Timeout) as e:
+                res, error = None, e
+            with self.lock:
+                self.tiempos.append(time.perf_counter() - inicio)
+                if res is not None:
+                    self.actualizar_limite(res)
+            if res is not None and not self.reintentable(res):
+                return res
+            if intento == REINTENTOS:
+                break
+
+            pausa = self.pausa(intento, res)
+            motivo = f"HTTP {res.status_code}" if res is not None else type(error).__name__
+            print(f"🔁 {motivo}, reintento {intento + 1}/{REINTENTOS} en {pausa:.1f}s")
+            with self.lock:
+                self.reintentos += 1
+            self.dormir(pausa)
+
+        if res is None:
+            raise Exception(f"Sin respuesta de {url} tras {REINTENTOS + 1} intentos: {error}")
+        return res
+
+    def resumen(self):
+        """Estadísticas de las peticiones para la línea de Tiempo total."""
+        if not self.tiempos:
+            return ""
+        tiempos = sorted(self.tiempos)
+        mediana = tiempos[len(tiempos) // 2] * 1000
+        texto = (f"🌐 {len(tiempos)} peticiones en {sum(tiempos):.2f}s "
+                 f"(p50 {mediana:.0f} ms, máx {tiempos[-1] * 1000:.0f} ms), {self.reintentos} reintentos")
+        if self.espera_limite:
+            texto += f", {self.espera_limite:.1f}s esperando el límite"
+        if self.restantes is not None:
+            texto += f", {self.restantes} restantes"
+        return texto
+
+    def cerrar(self):
+        self.session.close()
+
+
+class CacheHttp:
+    """Respuestas JSON guardadas en disco por URL junto con su ETag y Last-Modified.
+
+    Con ellas se envía If-None-Match / If-Modified-Since; un 304 devuelve la
+    respuesta guardada y GitHub no lo descuenta del límite de peticiones.
+    """
+
+    def __init__(self, ruta=RUTA_CACHE_HTTP):
+        self.ruta = ruta
+        self.entradas = {}
+        self.modificada = False
+        self.no_modificadas = 0
+        self.lock = threading.Lock()
+        if os.path.exists(ruta):
+            try:
+                with open(ruta, encoding="utf-8") as f:
+                    self.entradas = json.load(f)
+            except (OSError, ValueError):
+                print(f"⚠️ Caché HTTP ilegible, se ignora: {ruta}")
 
+    def cabeceras(self, url):
+        """Cabeceras condicionales para `url` (vacías si no está en caché)."""
+        entrada = self.entradas.get(url)
+        if not entrada:
+            return {}
+        headers = {}
+        if entrada.get("etag"):
+            headers["If-None-Match"] = entrada["etag"]
+        if entrada.get("last_modified"):
+            headers["If-Modified-Since"] = entrada["last_modified"]
+        return headers
+
+    def no_modificada(self, url):
+        """Respuesta guardada de `url` tras un 304."""
+        with self.lock:
+            self.no_modificadas += 1
+            return self.entradas[url]["datos"]
+
+    def registrar(self, url, res, datos):
+        """Guardar una respuesta 200 si trae validadores."""
+        etag = res.headers.get("ETag")
+        last_modified = res.headers.get("Last-Modified")
+        if etag or last_modified:
+            with self.lock:
+                self.entradas[url] = {"etag": etag, "last_modified": last_modified, "datos": datos}
+                self.modificada = True
+
+    def guardar(self):
+        """Escribir la caché (reemplazo atómico) si cambió."""
+        if not self.modificada:
+            return
+        temporal = f"{self.ruta}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(self.entradas, f)
+        os.replace(temporal, self.ruta)
+        self.modificada = False
+
+
+def obtener_json(url, cliente, cache=None):
+    """GET a la API de GitHub; con `cache`, como petición condicional."""
+    headers = cache.cabeceras(url) if cache is not None else {}
+
+    res = cliente.get(url, headers=headers)
+
+    if res.status_code == 304 and cache is not None:
+        return cache.no_modificada(url)
     if res.status_code != 200:
         raise Exception(f"Error {res.status_code}: {res.text}")
 
     data = res.json()
+    if cache is not None:
+        cache.registrar(url, res, data)
+    return data
+
+
+def obtener_commit_mas_reciente(cliente, cache=None):
+    """Obtiene el commit más reciente del branch."""
+    print("🔄 Verificando commit más reciente...")
+    data = obtener_json(API_URL, cliente, cache)
     sha = data["commit"]["sha"]
     fecha = data["commit"]["commit"]["committer"]["date"]
 
@@ -36,33 +264,346 @@ def obtener_commit_mas_reciente():
     return sha
 
 
+def glob_a_regex(patron):
+    """Traduce un glob de rutas a regex: * y ? no cruzan '/', ** sí."""
+    partes = []
+    i = 0
+    while i < len(patron):
+        if patron.startswith("**/", i):
+            partes.append("(?:[^/]*/)*")
+            i += 3
+        elif patron.startswith("**", i):
+            partes.append(".*")
+            i += 2
+        elif patron[i] == "*":
+            partes.append("[^/]*")
+            i += 1
+        elif patron[i] == "?":
+            partes.append("[^/]")
+            i += 1
+        else:
+            partes.append(re.escape(patron[i]))
+            i += 1
+    return "".join(partes)
+
+
+RE_SEGMENTO_GLOB = re.compile(r"\*\*/([^/*?\[\]]+)/\*\*")
+RE_PREFIJO_CARPETAS = re.compile(r"(?:[^/*?\[\]]+/)+")
+RE_GLOB_ARCHIVO = re.compile(r"\*\*/[^/]+")
+MAX_CARPETAS_MEMO = 1_000_000   # Carpetas cuyo resultado se recuerda (se vacía al llenarse)
+
+
+class Clasificador:
+    """Reglas prefijo/extension/glob compiladas para clasificar cada ruta en una pasada.
+
+    Gana la regla coincidente con menor índice (la primera del archivo). Los
+    prefijos de carpetas van a un trie por segmento, los globs **/carpeta/**
+    a un dict de segmentos y las extensiones a un dict; la parte que depende
+    solo de la carpeta se memoriza. Los globs **/nombre se unen en una regex
+    sobre el nombre de archivo y los demás en otra sobre la ruta completa,
+    con un grupo por regla; solo se prueban si pueden ganarle a lo encontrado.
+    """
+
+    def __init__(self, reglas):
+        self.categorias = []
+        self.prefijos = {}        # Trie: segmento → nodo; la clave None guarda el índice de la regla
+        self.segmentos = {}       # Carpeta en cualquier nivel → índice
+        self.extensiones = {}     # Extensión sin punto → índice
+        alternativas = {"archivo": [], "ruta": []}
+        self.indice_por_grupo = {}
+        self.por_carpeta = {}
+        # Va en la cabecera de raw_links.txt: otras reglas obligan a reescribirlo
+        self.huella = hashlib.sha256(json.dumps(reglas, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        for indice, regla in enumerate(reglas):
+            categoria = regla.get("categoria")
+            if categoria not in CATEGORIAS:
+                raise ValueError(f"Regla {indice + 1}: categoría desconocida {categoria!r}")
+            tipos = [t for t in ("prefijo", "extension", "glob") if t in regla]
+            if len(tipos) != 1:
+                raise ValueError(f"Regla {indice + 1}: se espera exactamente uno de prefijo, extension o glob")
+            self.categorias.append(categoria)
+            valores = regla[tipos[0]]
+            for valor in [valores] if isinstance(valores, str) else valores:
+                valor = valor.lower()
+                if tipos[0] == "extension":
+                    self.extensiones.setdefault(valor.lstrip("."), indice)
+                elif tipos[0] == "prefijo" and RE_PREFIJO_CARPETAS.fullmatch(valor):
+                    nodo = self.prefijos
+                    for segmento in valor.rstrip("/").split("/"):
+                        nodo = nodo.setdefault(segmento, {})
+                    nodo.setdefault(None, indice)
+                elif tipos[0] == "glob" and RE_SEGMENTO_GLOB.fullmatch(valor):
+                    self.segmentos.setdefault(RE_SEGMENTO_GLOB.fullmatch(valor).group(1), indice)
+                elif tipos[0] == "glob" and RE_GLOB_ARCHIVO.fullmatch(valor):
+                    self.agregar_alternativa(alternativas["archivo"], glob_a_regex(valor[3:]), indice)
+                elif tipos[0] == "glob":
+                    self.agregar_alternativa(alternativas["ruta"], glob_a_regex(valor), indice)
+                else:
+                    self.agregar_alternativa(alternativas["ruta"], re.escape(valor) + ".*", indice)
+        self.sin_regla = len(self.categorias)
+        self.resultados = self.categorias + ["otros"]
+        self.regex_archivo, self.minimo_archivo = self.compilar(alternativas["archivo"])
+        self.regex_ruta, self.minimo_ruta = self.compilar(alternativas["ruta"])
+        # Una carpeta con índice <= corte ya no puede perder contra el nombre de archivo
+        self.corte = min([self.minimo_archivo, self.minimo_ruta, *self.extensiones.values()]) - 1
+
+    def agregar_alternativa(self, alternativas, patron, indice):
+        grupo = f"r{len(self.indice_por_grupo)}"
+        alternativas.append((f"(?P<{grupo}>{patron})", indice))
+        self.indice_por_grupo[grupo] = indice
+
+    def compilar(self, alternativas):
+        """Regex única (en orden de regla) y el menor índice que puede devolver."""
+        if not alternativas:
+            return None, len(self.categorias)
+        alternativas.sort(key=lambda a: a[1])
+        return re.compile("|".join(p for p, _ in alternativas), re.DOTALL), alternativas[0][1]
+
+    def indice_carpeta(self, carpeta):
+        """Menor índice entre prefijos y segmentos que coinciden con la carpeta."""
+        mejor = self.sin_regla
+        if not carpeta:
+            return mejor
+        carpetas = carpeta.split("/")
+        nodo = self.prefijos
+        for segmento in carpetas:
+            nodo = nodo.get(segmento)
+            if nodo is None:
+                break
+            indice = nodo.get(None, mejor)
+            if indice < mejor:
+                mejor = indice
+        for segmento in carpetas:
+            indice = self.segmentos.get(segmento, mejor)
+            if indice < mejor:
+                mejor = indice
+        return mejor
+
+    @classmethod
+    def desde_archivo(cls, ruta=RUTA_REGLAS):
+        with open(ruta, encoding="utf-8") as f:
+            return cls(json.load(f)["reglas"])
+
+    def __call__(self, path):
+        carpeta, _, archivo = path.rpartition("/")
+        mejor = self.por_carpeta.get(carpeta)
+        if mejor is None:
+            if len(self.por_carpeta) >= MAX_CARPETAS_MEMO:
+                self.por_carpeta.clear()
+            mejor = self.por_carpeta[carpeta] = self.indice_carpeta(carpeta.lower())
+        if mejor <= self.corte:
+            return self.resultados[mejor]
+        archivo = archivo.lower()
+
+        # Todas las extensiones posibles: "a.test.js" prueba "test.js" y "js"
+        punto = archivo.find(".")
+        while punto != -1:
+            indice = self.extensiones.get(archivo[punto + 1:], mejor)
+            if indice < mejor:
+                mejor = indice
+            punto = archivo.find(".", punto + 1)
+
+        if self.minimo_archivo < mejor:
+            m = self.regex_archivo.fullmatch(archivo)
+            if m and self.indice_por_grupo[m.lastgroup] < mejor:
+                mejor = self.indice_por_grupo[m.lastgroup]
+        if self.minimo_ruta < mejor:
+            m = self.regex_ruta.fullmatch(path.lower())
+            if m and self.indice_por_grupo[m.lastgroup] < mejor:
+                mejor = self.indice_por_grupo[m.lastgroup]
+
+        return self.resultados[mejor]
+
+
+CLASIFICADOR = None
+
+
+def clasificador_actual():
+    """Clasificador de --reglas, o el de reglas-links.json cargado al primer uso."""
+    global CLASIFICADOR
+    if CLASIFICADOR is None:
+        CLASIFICADOR = Clasificador.desde_archivo()
+    return CLASIFICADOR
+
+
 def clasificar_archivo(path):
-    """Determina la categoría del archivo (backend, frontend, docs)."""
-    lower = path.lower()
-
-    if any(x in lower for x in ["api", "flask", "server", "models", "routes", "config"]) or lower.endswith(".py"):
-        return "backend"
-    elif any(x in lower for x in ["public", "html", "js", "css", "assets"]):
-        return "frontend"
-    elif any(lower.endswith(ext) for ext in [".md", ".pdf", ".txt", ".docx"]) or "docs" in lower:
-        return "docs"
-    else:
-        return "otros"
+    """Determina la categoría del archivo (backend, frontend, docs, otros) según reglas-links.json."""
+    return clasificador_actual()(path)
+
+
+ARCHIVOS_POR_CARPETA = 8   # Promedio del monorepo sintético de --bench-clasificador
+
+
+def rutas_sinteticas(cantidad, semilla=0):
+    """Rutas de un monorepo sintético: las carpetas forman un árbol (cada una
+    cuelga de una raíz o de otra carpeta) con ARCHIVOS_POR_CARPETA archivos de media."""
+    rng = random.Random(semilla)
+    raices = ["backend", "frontend", "docs", "src", "packages", "tools", "lib", "Docs", "apps"]
+    nombres = ["api", "controllers", "assets", "js", "public", "config", "utils", "models",
+               "components", "json", "pages", "core", "tests", "styles", "routes", "vendor",
+               "server", "hooks", "i18n", "scripts", "fixtures", "images", "ui", "shared"]
+    extensiones = [".js", ".py", ".json", ".md", ".css", ".html", ".txt", ".png", ".yml", ".ts",
+                   ".test.js", ".d.ts", ""]
+
+    arbol = list(raices)
+    vistas = set(arbol)
+    for _ in range(max(1, cantidad // ARCHIVOS_POR_CARPETA)):
+        carpeta = f"{rng.choice(arbol)}/{rng.choice(nombres)}"
+        if carpeta not in vistas:
+            vistas.add(carpeta)
+            arbol.append(carpeta)
+    return [f"{rng.choice(arbol)}/archivo{rng.randrange(10000)}{rng.choice(extensiones)}"
+            for _ in range(cantidad)]
+
+
+def benchmark_clasificador(cantidad, semilla=0):
+    """Mide la clasificación de `cantidad` rutas sintéticas de un monorepo."""
+    print(f"🧪 Generando {cantidad} rutas sintéticas...")
+    rutas = rutas_sinteticas(cantidad, semilla)
+    print(f"   • {len({r.rpartition('/')[0] for r in rutas})} carpetas distintas")
+
+    inicio = time.perf_counter()
+    conteo = {c: 0 for c in CATEGORIAS}
+    for ruta in rutas:
+        conteo[clasificar_archivo(ruta)] += 1
+    duracion = time.perf_counter() - inicio
+
+    print(f"⚡ {cantidad} rutas en {duracion:.2f}s ({cantidad / duracion:.0f} rutas/s, "
+          f"{duracion / cantidad * 1e6:.2f} µs/ruta)")
+    print("📊 " + " | ".join(f"{conteo[c]} {c}" for c in CATEGORIAS))
+    return duracion
+
+
+def ejecutar_git(repo, *args):
+    """Ejecuta un comando git en `repo` y devuelve su salida (bytes)."""
+    try:
+        resultado = subprocess.run(["git", "-C", repo, *args], capture_output=True, check=True)
+    except FileNotFoundError:
+        raise Exception("git no está instalado o no está en el PATH")
+    except subprocess.CalledProcessError as e:
+        raise Exception(f"git {' '.join(args)}: {e.stderr.decode('utf-8', 'replace').strip()}")
+    return resultado.stdout
+
 
+def obtener_archivos_local(ref, repo=REPO_LOCAL):
+    """Commit y rutas de archivos de `ref` leídos del repositorio local (sin red)."""
+    print(f"🗂️  Leyendo árbol local de {ref}...")
+    sha = ejecutar_git(repo, "rev-parse", "--verify", f"{ref}^{{commit}}").decode("ascii").strip()
 
-def generar_raw_links():
-    """Genera el archivo raw_links.txt sobrescribiéndolo cada vez."""
-    sha = obtener_commit_mas_reciente()
+    # Mismo orden que git/trees?recursive=1; -z evita el escapado de rutas con caracteres especiales
+    salida = ejecutar_git(repo, "ls-tree", "-r", "-z", "--full-tree", sha)
+    rutas = []
+    for entrada in salida.split(b"\0"):
+        if not entrada:
+            continue
+        meta, _, ruta = entrada.partition(b"\t")
+        if meta.split(b" ")[1] == b"blob":
+            rutas.append(ruta.decode("utf-8", "surrogateescape"))
 
-    tree_url = f"https://api.github.com/repos/{USER}/{REPO}/git/trees/{sha}?recursive=1"
-    headers = {"Authorization": f"token {TOKEN}"} if TOKEN else {}
+    print(f"✅ Commit local: {sha[:8]} ({ref})")
+    return sha, rutas
+
+
+def obtener_archivos_api(sha, cliente, cache=None):
+    """Rutas de los archivos del commit `sha` (API de GitHub)."""
+    tree_url = f"{API_BASE}/repos/{USER}/{REPO}/git/trees/{sha}?recursive=1"
 
     print("📡 Obteniendo estructura del repositorio...")
-    res = requests.get(tree_url, headers=headers)
-    res.raise_for_status()
-    data = res.json()
+    data = obtener_json(tree_url, cliente, cache)
+
+    if data.get("truncated"):
+        print(f"⚠️ Árbol recursivo truncado ({len(data['tree'])} entradas); recorriendo por niveles...")
+        return obtener_archivos_por_niveles(data["sha"], cliente, cache)
+    return [item["path"] for item in data["tree"] if item["type"] == "blob"]
+
+
+def obtener_archivos_por_niveles(sha_raiz, cliente, cache=None):
+    """Rutas de archivos recorriendo el árbol nivel por nivel (sin ?recursive=1).
+
+    Los subárboles de cada nivel se descargan en paralelo y cada SHA una sola
+    vez: directorios idénticos comparten SHA. El resultado se arma en preorden,
+    el mismo orden que devuelve ?recursive=1.
+    """
+    arboles = {}
+    vistos = {sha_raiz}
+    referencias = 0
+    nivel = [sha_raiz]
+    profundidad = 0
+
+    def descargar(sha):
+        return obtener_json(f"{API_BASE}/repos/{USER}/{REPO}/git/trees/{sha}", cliente, cache)
+
+    with ThreadPoolExecutor(max_workers=HILOS_ARBOL) as executor:
+        while nivel:
+            profundidad += 1
+            siguiente = []
+            for sha, data in zip(nivel, executor.map(descargar, nivel)):
+                if data.get("truncated"):
+                    raise Exception(f"El subárbol {sha[:8]} está truncado incluso sin ?recursive=1")
+                arboles[sha] = data["tree"]
+                for item in data["tree"]:
+                    if item["type"] != "tree":
+                        continue
+                    referencias += 1
+                    if item["sha"] not in vistos:
+                        vistos.add(item["sha"])
+                        siguiente.append(item["sha"])
+            print(f"   🌿 Nivel {profundidad}: {len(nivel)} subárboles")
+            nivel = siguiente
+
+    print(f"   🌳 {len(arboles)} subárboles descargados para {referencias + 1} directorios")
+
+    # Preorden con una pila de iteradores (sin límite de recursión)
+    rutas = []
+    pila = [(iter(arboles[sha_raiz]), "")]
+    while pila:
+        item = next(pila[-1][0], None)
+        if item is None:
+            pila.pop()
+            continue
+        ruta = pila[-1][1] + item["path"]
+        if item["type"] == "blob":
+            rutas.append(ruta)
+        elif item["type"] == "tree":
+            pila.append((iter(arboles[item["sha"]]), ruta + "/"))
+    return rutas
 
-    archivos = [item for item in data["tree"] if item["type"] == "blob"]
+
+def leer_cabecera(ruta):
+    """{clave: valor} de las líneas '# Clave: valor' de un raw_links.txt anterior ({} si no existe)."""
+    cabecera = {}
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            for linea in itertools.takewhile(lambda l: l.startswith("# "), itertools.islice(f, 10)):
+                clave, _, valor = linea[2:].partition(": ")
+                cabecera[clave] = valor.strip()
+    except OSError:
+        pass
+    return cabecera
+
+
+def generar_raw_links(ref=None, repo=REPO_LOCAL, cache=None, forzar=False, cliente=None):
+    """Genera el archivo raw_links.txt sobrescribiéndolo cada vez.
+
+    Con `ref`, el árbol se lee del repositorio local en lugar de la API.
+    En modo API, si el archivo existente se generó con el mismo origen,
+    commit y reglas no se descarga el árbol ni se reescribe (salvo con
+    `forzar`). Devuelve True si se escribió el archivo.
+    """
+    ruta_salida = os.path.join(os.getcwd(), "raw_links.txt")
+    cabecera = {"Origen": f"local {ref}" if ref else f"api {BRANCH}",
+                "Reglas": clasificador_actual().huella}
+    if ref:
+        sha, archivos = obtener_archivos_local(ref, repo)
+    else:
+        cliente = cliente or ClienteGitHub()
+        sha = obtener_commit_mas_reciente(cliente, cache)
+        anterior = leer_cabecera(ruta_salida)
+        if not forzar and all(anterior.get(k) == v for k, v in {**cabecera, "Commit": sha}.items()):
+            print(f"⏭️  {ruta_salida} ya corresponde al commit {sha[:8]} con las mismas reglas; sin cambios")
+            return False
+        archivos = obtener_archivos_api(sha, cliente, cache)
+    raw_base = RAW_BASE if ref in (None, BRANCH) else f"https://raw.githubusercontent.com/{USER}/{REPO}/{ref}/"
 
     print(f"📁 Total de archivos encontrados: {len(archivos)}")
 
@@ -72,9 +613,9 @@ def generar_raw_links():
     docs_links = []
     otros_links = []
 
-    for a in archivos:
-        url = f"{RAW_BASE}{a['path']}"
-        categoria = clasificar_archivo(a["path"])
+    for path in archivos:
+        url = f"{raw_base}{path}"
+        categoria = clasificar_archivo(path)
         if categoria == "backend":
             backend_links.append(url)
         elif categoria == "frontend":
@@ -85,10 +626,11 @@ def generar_raw_links():
             otros_links.append(url)
 
     # Generar salida
-    ruta_salida = os.path.join(os.getcwd(), "raw_links.txt")
     with open(ruta_salida, "w", encoding="utf-8") as f:
         f.write(f"# RAW LINKS — Actualizado {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
         f.write(f"# Repositorio: {USER}/{REPO}\n")
+        f.write(f"# Origen: {cabecera['Origen']}\n")
+        f.write(f"# Reglas: {cabecera['Reglas']}\n")
         f.write(f"# Commit: {sha}\n\n")
 
         f.write("========================= BACKEND LINKS =========================\n")
@@ -106,13 +648,58 @@ def generar_raw_links():
 
     print(f"✅ Archivo sobrescrito correctamente: {ruta_salida}")
     print(f"📊 {len(backend_links)} backend | {len(frontend_links)} frontend | {len(docs_links)} docs | {len(otros_links)} otros")
+    return True
+
+
+def parsear_argumentos():
+    """Leer opciones de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Genera raw_links.txt con los archivos del repositorio")
+    parser.add_argument("--local", nargs="?", const=BRANCH, metavar="REF",
+                        help=f"Leer el árbol de REF (rama, tag o commit) del repositorio local "
+                             f"con git ls-tree, sin llamadas a la API (por defecto {BRANCH})")
+    parser.add_argument("--repo", default=REPO_LOCAL,
+                        help="Ruta del repositorio local para --local (por defecto el de este script)")
+    parser.add_argument("--forzar", action="store_true",
+                        help="Reescribir raw_links.txt aunque el commit, el origen y las reglas no hayan cambiado")
+    parser.add_argument("--cache", default=RUTA_CACHE_HTTP, metavar="ARCHIVO",
+                        help=f"Caché HTTP con ETag/Last-Modified (por defecto {os.path.basename(RUTA_CACHE_HTTP)} "
+                             f"junto al script)")
+    parser.add_argument("--sin-cache", action="store_true",
+                        help="No usar ni actualizar la caché HTTP")
+    parser.add_argument("--reglas", default=RUTA_REGLAS, metavar="ARCHIVO",
+                        help=f"Reglas de clasificación (por defecto {os.path.basename(RUTA_REGLAS)})")
+    parser.add_argument("--espera-maxima", type=float, default=ESPERA_MAXIMA_LIMITE, metavar="SEGUNDOS",
+                        help="Máximo a esperar por el límite de la API o un Retry-After antes de fallar "
+                             f"(por defecto {ESPERA_MAXIMA_LIMITE}s)")
+    parser.add_argument("--bench-clasificador", type=int, metavar="N",
+                        help="Medir la clasificación de N rutas sintéticas y salir")
+    args = parser.parse_args()
+    try:
+        args.clasificador = Clasificador.desde_archivo(args.reglas)
+    except (OSError, ValueError, KeyError, re.error) as e:
+        parser.error(f"Reglas inválidas en {args.reglas}: {e}")
+    return args
 
 
 if __name__ == "__main__":
+    args = parsear_argumentos()
+    CLASIFICADOR = args.clasificador
+    if args.bench_clasificador:
+        benchmark_clasificador(args.bench_clasificador)
+        raise SystemExit(0)
+    cache = None if args.sin_cache or args.local else CacheHttp(args.cache)
+    cliente = ClienteGitHub(espera_maxima=args.espera_maxima)
     inicio = time.time()
     try:
-        generar_raw_links()
+        generar_raw_links(args.local, args.repo, cache, args.forzar, cliente)
     except Exception as e:
         print(f"💥 Error: {e}")
+    finally:
+        if cache is not None:
+            cache.guardar()
+        cliente.cerrar()
     fin = time.time()
-    print(f"⏱️ Tiempo total: {fin - inicio:.2f}s")
+    estadisticas = cliente.resumen()
+    if estadisticas and cache is not None and cache.no_modificadas:
+        estadisticas += f", {cache.no_modificadas} respuestas 304 desde caché"
+    print(f"⏱️ Tiempo total: {fin - inicio:.2f}s" + (f" | {estadisticas}" if estadisticas else ""))
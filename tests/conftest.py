@@ -0,0 +1,95 @@
+"""
+Fixtures de las pruebas de siembra
+
+Los scripts tienen guion en el nombre (crear-admin.py, crear-lecciones.py, ...),
+así que se cargan con importlib. La BD es SQLite en memoria compartida por
+las conexiones de cada prueba (backend/scripts/adaptador_bd.py).
+"""
+
+import importlib.util
+import os
+import sys
+import uuid
+
+import pytest
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+RUTA_SCRIPTS = os.path.join(RAIZ, "backend", "scripts")
+sys.path.insert(0, RUTA_SCRIPTS)
+
+import adaptador_bd  # noqa: E402
+
+def cargar_script(nombre, ruta):
+    """Importar un script por ruta y registrarlo en sys.modules (para pickle)"""
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nombre] = modulo
+    spec.loader.exec_module(modulo)
+    return modulo
+
+@pytest.fixture(scope="session")
+def crear_admin():
+    return cargar_script("crear_admin", os.path.join(RUTA_SCRIPTS, "crear-admin.py"))
+
+@pytest.fixture(scope="session")
+def crear_lecciones():
+    return cargar_script("crear_lecciones", os.path.join(RAIZ, "docs", "utils", "crear-lecciones.py"))
+
+@pytest.fixture(scope="session")
+def generar_links():
+    return cargar_script("generar_links", os.path.join(RAIZ, "docs", "utils", "generar-links.py"))
+
+@pytest.fixture(scope="session")
+def generar_poblacion():
+    return cargar_script("generar_poblacion", os.path.join(RUTA_SCRIPTS, "generar-poblacion.py"))
+
+@pytest.fixture(scope="session")
+def generar_actividad():
+    return cargar_script("generar_actividad", os.path.join(RUTA_SCRIPTS, "generar-actividad.py"))
+
+@pytest.fixture
+def nueva_dsn():
+    """Fábrica de DSN de BD en memoria nuevas; una conexión mantiene viva cada una durante la prueba"""
+    testigos = []
+
+    def crear():
+        dsn = f"sqlite:///file:siembra_{uuid.uuid4().hex}?mode=memory&cache=shared"
+        testigos.append(adaptador_bd.conectar(adaptador_bd.config_sqlite(dsn)))
+        return dsn
+    yield crear
+    for testigo in testigos:
+        testigo.close()
+
+@pytest.fixture
+def dsn(nueva_dsn):
+    """DSN de una BD en memoria nueva"""
+    return nueva_dsn()
+
+@pytest.fixture
+def bd(dsn):
+    """Conexión de consulta (filas como diccionarios) a la BD de la prueba"""
+    conexion = adaptador_bd.conectar(adaptador_bd.config_sqlite(dsn, filas_dict=True))
+    yield conexion
+    conexion.close()
+
+@pytest.fixture
+def sembrar_usuarios(crear_admin, dsn):
+    """Aplicar los usuarios fijos de crear-admin.py con un costo bcrypt mínimo"""
+    def sembrar():
+        return crear_admin.aplicar_usuarios(crear_admin.usuarios, conexiones=1, costo=4,
+                                            config=crear_admin.config_desde_dsn(dsn))
+    return sembrar
+
+@pytest.fixture
+def sembrar_lecciones(crear_lecciones, dsn, monkeypatch):
+    """Ejecutar main() de crear-lecciones.py contra la BD de la prueba; devuelve el código de salida"""
+    monkeypatch.setattr(crear_lecciones, "DB_CONFIG", dict(crear_lecciones.DB_CONFIG))
+
+    def sembrar(*opciones):
+        monkeypatch.setattr(sys, "argv", ["crear-lecciones.py", "--dsn", dsn, "--yes", *opciones])
+        try:
+            crear_lecciones.main()
+        except SystemExit as e:
+            return e.code or 0
+        return 0
+    return sembrar
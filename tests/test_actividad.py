@@ -0,0 +1,46 @@
+"""
+generar-actividad.py sobre lecciones, ejercicios y alumnos sembrados en SQLite
+"""
+
+import adaptador_bd
+
+ALUMNOS = 40
+
+def contar(bd, tabla):
+    with bd.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) AS total FROM {tabla}")
+        return cursor.fetchone()["total"]
+
+def test_actividad_y_reanudacion(generar_poblacion, generar_actividad, sembrar_usuarios, sembrar_lecciones,
+                                 dsn, bd):
+    sembrar_usuarios()
+    assert sembrar_lecciones("--ejercicios") == 0
+    config = adaptador_bd.config_desde_dsn(dsn)
+    tareas = generar_poblacion.planificar_chunks(ALUMNOS, 0, 0, 1, 10)
+    generar_poblacion.aplicar_poblacion(tareas, 1, generar_poblacion.hash_poblacion("Test123!", 4, 1),
+                                        conexiones=1, config=config)
+
+    contadores = generar_actividad.generar_actividad(semilla=3, tamano_lote=7, conexiones=1, config=config)
+    assert contadores["alumnos"] == ALUMNOS and contadores["omitidos"] == 0
+    assert contadores["progresos"] == contar(bd, "progreso_lecciones") > 0
+    assert contadores["resultados"] == contar(bd, "resultados_ejercicios") > 0
+    with bd.cursor() as cursor:
+        # Solo alumnos, y cada resultado pertenece a una lección que el alumno inició
+        cursor.execute("""
+            SELECT COUNT(*) AS total FROM resultados_ejercicios r
+            JOIN ejercicios e ON e.id = r.ejercicio_id
+            LEFT JOIN progreso_lecciones p ON p.usuario_id = r.usuario_id AND p.leccion_id = e.leccion_id
+            WHERE p.id IS NULL
+        """)
+        assert cursor.fetchone()["total"] == 0
+        cursor.execute("""
+            SELECT COUNT(DISTINCT p.usuario_id) AS total FROM progreso_lecciones p
+            JOIN usuarios u ON u.id = p.usuario_id WHERE u.rol <> 'alumno'
+        """)
+        assert cursor.fetchone()["total"] == 0
+
+    # Segunda ejecución: los alumnos con actividad se omiten y no se duplica nada
+    repetida = generar_actividad.generar_actividad(semilla=3, tamano_lote=7, conexiones=1, config=config)
+    assert repetida == {"alumnos": 0, "omitidos": ALUMNOS, "progresos": 0, "resultados": 0}
+    assert contar(bd, "progreso_lecciones") == contadores["progresos"]
+    assert contar(bd, "resultados_ejercicios") == contadores["resultados"]
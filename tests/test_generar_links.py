@@ -0,0 +1,304 @@
+"""
+generar-links.py contra un servidor HTTP local que imita la API de GitHub
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import subprocess
+import threading
+import time
+
+import pytest
+
+ARBOL = ["backend/server.js", "frontend/index.html", "docs/README.md", "LICENSE"]
+
+class ApiFalsa:
+    """Rama con un commit y árboles recursivos; ETag = SHA del contenido"""
+
+    def __init__(self):
+        self.sha = "a" * 40
+        self.peticiones = []  # (ruta, código)
+        self.fallos = []      # (código, cabeceras) a devolver antes de la respuesta normal
+        self.limite = {}      # Cabeceras X-RateLimit-* de todas las respuestas
+        self.arboles = None   # {sha: entradas}: el árbol recursivo se responde truncado
+        self.rutas = ARBOL    # Archivos del árbol recursivo, en el orden de la API
+
+    def responder(self, ruta, if_none_match):
+        if self.fallos:
+            codigo, cabeceras = self.fallos.pop(0)
+            return codigo, cabeceras, b'{"message": "fallo"}'
+        if "/branches/" in ruta:
+            etag = f'"rama-{self.sha}"'
+            datos = {"commit": {"sha": self.sha, "commit": {"committer": {"date": "2025-01-01T00:00:00Z"}}}}
+        elif "/git/trees/" in ruta and self.arboles is not None:
+            sha = ruta.split("/git/trees/")[1].split("?")[0]
+            if "recursive=1" in ruta:
+                etag = '"arbol-recursivo"'
+                datos = {"sha": "raiz", "truncated": True, "tree": self.arboles["raiz"][:1]}
+            else:
+                etag = f'"arbol-{sha}"'
+                datos = {"sha": sha, "truncated": False, "tree": self.arboles[sha]}
+        elif "/git/trees/" in ruta:
+            sha = ruta.split("/git/trees/")[1].split("?")[0]
+            etag = f'"arbol-{sha}"'
+            datos = {"sha": sha, "truncated": False,
+                     "tree": [{"path": p, "type": "blob"} for p in self.rutas]}
+        else:
+            return 404, {}, b"{}"
+        if if_none_match == etag:
+            return 304, {"ETag": etag}, b""
+        return 200, {"ETag": etag, "Content-Type": "application/json"}, json.dumps(datos).encode("utf-8")
+
+@pytest.fixture
+def api(generar_links, monkeypatch, tmp_path):
+    falsa = ApiFalsa()
+
+    class Manejador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            codigo, cabeceras, cuerpo = falsa.responder(self.path, self.headers.get("If-None-Match"))
+            falsa.peticiones.append((self.path, codigo))
+            self.send_response(codigo)
+            for clave, valor in {**falsa.limite, **cabeceras}.items():
+                self.send_header(clave, valor)
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+    hilo = threading.Thread(target=servidor.serve_forever, args=(0.05,), daemon=True)
+    hilo.start()
+    base = f"http://127.0.0.1:{servidor.server_address[1]}"
+    monkeypatch.setattr(generar_links, "API_BASE", base)
+    monkeypatch.setattr(generar_links, "API_URL",
+                        f"{base}/repos/{generar_links.USER}/{generar_links.REPO}/branches/{generar_links.BRANCH}")
+    monkeypatch.chdir(tmp_path)
+    yield falsa
+    servidor.shutdown()
+    servidor.server_close()
+
+def codigos(api):
+    codigos = [codigo for _, codigo in api.peticiones]
+    api.peticiones.clear()
+    return codigos
+
+def test_mismo_commit_no_descarga_arbol_ni_reescribe(generar_links, api, tmp_path):
+    cache = generar_links.CacheHttp(str(tmp_path / "cache.json"))
+    assert generar_links.generar_raw_links(cache=cache) is True
+    assert codigos(api) == [200, 200]
+    contenido = (tmp_path / "raw_links.txt").read_text(encoding="utf-8")
+
+    assert generar_links.generar_raw_links(cache=cache) is False
+    assert codigos(api) == [304]
+    assert (tmp_path / "raw_links.txt").read_text(encoding="utf-8") == contenido
+
+def test_commit_nuevo_reescribe(generar_links, api, tmp_path):
+    cache = generar_links.CacheHttp(str(tmp_path / "cache.json"))
+    generar_links.generar_raw_links(cache=cache)
+    codigos(api)
+
+    api.sha = "b" * 40
+    assert generar_links.generar_raw_links(cache=cache) is True
+    assert codigos(api) == [200, 200]
+    assert f"# Commit: {api.sha}\n" in (tmp_path / "raw_links.txt").read_text(encoding="utf-8")
+
+def test_otras_reglas_u_origen_reescriben(generar_links, api, tmp_path, monkeypatch):
+    cache = generar_links.CacheHttp(str(tmp_path / "cache.json"))
+    generar_links.generar_raw_links(cache=cache)
+    salida = tmp_path / "raw_links.txt"
+    assert f"# Reglas: {generar_links.clasificador_actual().huella}\n" in salida.read_text(encoding="utf-8")
+
+    # El archivo anterior salió de --local con otra ref: mismo commit, pero hay que reescribirlo
+    salida.write_text(salida.read_text(encoding="utf-8").replace("# Origen: api main", "# Origen: local v1"),
+                      encoding="utf-8")
+    assert generar_links.generar_raw_links(cache=cache) is True
+    assert "# Origen: api main\n" in salida.read_text(encoding="utf-8")
+    assert generar_links.generar_raw_links(cache=cache) is False
+
+    monkeypatch.setattr(generar_links, "CLASIFICADOR",
+                        generar_links.Clasificador([{"categoria": "docs", "extension": ".html"}]))
+    assert generar_links.generar_raw_links(cache=cache) is True
+    contenido = salida.read_text(encoding="utf-8")
+    assert generar_links.RAW_BASE + "frontend/index.html" in contenido.split("DOCS LINKS")[1]
+
+def test_cache_persistente_responde_304(generar_links, api, tmp_path):
+    ruta_cache = str(tmp_path / "cache.json")
+    cache = generar_links.CacheHttp(ruta_cache)
+    generar_links.generar_raw_links(cache=cache)
+    cache.guardar()
+    contenido = (tmp_path / "raw_links.txt").read_text(encoding="utf-8")
+    (tmp_path / "raw_links.txt").unlink()
+    codigos(api)
+
+    # Otra ejecución: sin archivo previo, ambas peticiones se resuelven con 304
+    cache = generar_links.CacheHttp(ruta_cache)
+    assert generar_links.generar_raw_links(cache=cache) is True
+    assert codigos(api) == [304, 304]
+    assert cache.no_modificadas == 2
+    nuevo = (tmp_path / "raw_links.txt").read_text(encoding="utf-8")
+    assert nuevo.split("\n", 1)[1] == contenido.split("\n", 1)[1]
+
+def cliente_sin_esperas(generar_links):
+    """ClienteGitHub que registra las pausas en lugar de dormir"""
+    pausas = []
+    return generar_links.ClienteGitHub(dormir=pausas.append), pausas
+
+def test_reintenta_errores_5xx(generar_links, api):
+    cliente, pausas = cliente_sin_esperas(generar_links)
+    api.fallos = [(502, {}), (503, {})]
+
+    assert generar_links.generar_raw_links(cliente=cliente) is True
+    assert codigos(api) == [502, 503, 200, 200]
+    assert cliente.reintentos == 2 and len(pausas) == 2
+    assert all(0 <= p <= generar_links.BACKOFF_BASE * 2 ** i for i, p in enumerate(pausas))
+    assert "4 peticiones" in cliente.resumen()
+
+def test_espera_al_reinicio_del_limite(generar_links, api):
+    cliente, pausas = cliente_sin_esperas(generar_links)
+    reinicio = str(int(time.time()) + 60)
+    api.fallos = [(403, {"X-RateLimit-Limit": "60", "X-RateLimit-Remaining": "0",
+                         "X-RateLimit-Reset": reinicio})]
+    api.limite = {"X-RateLimit-Limit": "60", "X-RateLimit-Reset": str(int(time.time()) - 1),
+                  "X-RateLimit-Remaining": "59"}
+
+    assert generar_links.generar_raw_links(cliente=cliente) is True
+    assert codigos(api) == [403, 200, 200]
+    # Sin backoff: una sola espera hasta el reinicio anunciado
+    assert pausas[0] == 0 and 55 < pausas[1] <= 62 and len(pausas) == 2
+
+def test_retry_after_con_tope(generar_links, api):
+    pausas = []
+    cliente = generar_links.ClienteGitHub(dormir=pausas.append, espera_maxima=120)
+    api.fallos = [(429, {"Retry-After": "90"}), (429, {"Retry-After": "pronto"})]
+
+    assert generar_links.generar_raw_links(cliente=cliente) is True
+    # 90 s se respeta; un valor ilegible cae al backoff normal
+    assert pausas[0] == 90 and 0 <= pausas[1] <= generar_links.BACKOFF_BASE * 2
+
+    codigos(api)
+    pausas.clear()
+    api.fallos = [(429, {"Retry-After": "86400"})]
+    with pytest.raises(Exception, match="86400s.*máximo de 120s"):
+        generar_links.generar_raw_links(cliente=cliente, forzar=True)
+    assert pausas == []
+
+def test_reparte_el_presupuesto_restante(generar_links, api):
+    cliente, pausas = cliente_sin_esperas(generar_links)
+    api.limite = {"X-RateLimit-Limit": "60", "X-RateLimit-Remaining": "3",
+                  "X-RateLimit-Reset": str(int(time.time()) + 30)}
+
+    generar_links.generar_raw_links(cliente=cliente)
+    # Tras la primera respuesta quedan 3 peticiones para ~30 s: una cada ~10 s
+    assert len(pausas) == 1 and 8 < pausas[0] <= 10
+
+def test_forzar_reescribe_con_el_mismo_commit(generar_links, api, tmp_path):
+    cache = generar_links.CacheHttp(str(tmp_path / "cache.json"))
+    generar_links.generar_raw_links(cache=cache)
+    codigos(api)
+
+    assert generar_links.generar_raw_links(cache=cache, forzar=True) is True
+    assert codigos(api) == [304, 304]
+
+def test_arbol_truncado_se_recorre_por_niveles(generar_links, api, tmp_path):
+    def blob(nombre):
+        return {"path": nombre, "type": "blob", "sha": f"b-{nombre}"}
+
+    def arbol(nombre, sha):
+        return {"path": nombre, "type": "tree", "sha": sha}
+
+    # docs/, frontend/lib/ y vendor/ son el mismo directorio (mismo SHA)
+    api.arboles = {
+        "raiz": [blob("a.txt"), arbol("backend", "t-back"), arbol("docs", "t-comun"),
+                 arbol("frontend", "t-front"), blob("package.json"), arbol("vendor", "t-comun")],
+        "t-back": [arbol("routes", "t-rutas"), blob("server.js")],
+        "t-rutas": [blob("index.js")],
+        "t-front": [blob("index.html"), arbol("lib", "t-comun")],
+        "t-comun": [blob("README.md")],
+    }
+
+    assert generar_links.generar_raw_links(cliente=cliente_sin_esperas(generar_links)[0]) is True
+    arboles = [ruta.split("/git/trees/")[1] for ruta, _ in api.peticiones if "/git/trees/" in ruta]
+    assert sorted(arboles[1:]) == ["raiz", "t-back", "t-comun", "t-front", "t-rutas"]
+
+    base = generar_links.RAW_BASE
+    enlaces = [linea[len(base):] for linea in (tmp_path / "raw_links.txt").read_text(encoding="utf-8").splitlines()
+               if linea.startswith(base)]
+    orden_recursivo = ["a.txt", "backend/routes/index.js", "backend/server.js", "docs/README.md",
+                       "frontend/index.html", "frontend/lib/README.md", "package.json", "vendor/README.md"]
+    assert sorted(enlaces) == sorted(orden_recursivo)
+    por_seccion = {generar_links.clasificar_archivo(r): [] for r in orden_recursivo}
+    for ruta in orden_recursivo:
+        por_seccion[generar_links.clasificar_archivo(ruta)].append(ruta)
+    # Dentro de cada sección se conserva el preorden de ?recursive=1
+    for rutas in por_seccion.values():
+        assert [e for e in enlaces if e in rutas] == rutas
+
+def test_local_coincide_con_api(generar_links, api, tmp_path):
+    # Orden de ?recursive=1: preorden por bytes con '/' tras el nombre de cada directorio
+    rutas = ["LICENSE", "a-b/c.py", "a.txt", "a/b.js", "a0.md", "backend/api.js", "backend/api/x.js",
+             "docs/Guía ñ.md", "frontend/index.html"]
+    repo = tmp_path / "repo"
+    for ruta in reversed(rutas):
+        (repo / ruta).parent.mkdir(parents=True, exist_ok=True)
+        (repo / ruta).write_text(ruta, encoding="utf-8")
+    git = ["git", "-C", str(repo), "-c", "user.name=prueba", "-c", "user.email=prueba@example.com"]
+    subprocess.run(["git", "init", "-q", str(repo)], check=True)
+    subprocess.run(git + ["checkout", "-q", "-b", generar_links.BRANCH], check=True)
+    subprocess.run(git + ["add", "."], check=True)
+    subprocess.run(git + ["commit", "-q", "-m", "arbol"], check=True)
+    sha = subprocess.run(git + ["rev-parse", "HEAD"], check=True, capture_output=True, text=True).stdout.strip()
+
+    assert generar_links.obtener_archivos_local(generar_links.BRANCH, str(repo)) == (sha, rutas)
+
+    api.sha, api.rutas = sha, rutas
+    assert generar_links.generar_raw_links(cliente=cliente_sin_esperas(generar_links)[0]) is True
+    desde_api = (tmp_path / "raw_links.txt").read_text(encoding="utf-8")
+    assert generar_links.generar_raw_links(generar_links.BRANCH, str(repo)) is True
+    desde_local = (tmp_path / "raw_links.txt").read_text(encoding="utf-8")
+    # Todo igual salvo la fecha de generación
+    assert desde_local.split("# Commit: ", 1)[1] == desde_api.split("# Commit: ", 1)[1]
+
+# ============================================
+# CLASIFICADOR
+# ============================================
+@pytest.mark.parametrize("ruta, categoria", [
+    ("backend/controllers/authController.js", "backend"),
+    ("backend/.env", "backend"),
+    ("frontend/public/js/config.js", "frontend"),
+    ("docs/utils/catalogo-lecciones/niveles/A1.json", "docs"),
+    ("Docs/Guia.PDF", "docs"),
+    ("src/api/cliente.ts", "backend"),
+    ("herramientas/server.js", "backend"),
+    ("src/ui/boton.test.js", "frontend"),
+    ("notas/README_RAPIDO.md", "docs"),
+    ("LICENSE", "otros"),
+])
+def test_reglas_por_defecto(generar_links, ruta, categoria):
+    assert generar_links.Clasificador.desde_archivo()(ruta) == categoria
+
+def test_gana_la_primera_regla(generar_links):
+    clasificar = generar_links.Clasificador([
+        {"categoria": "docs", "glob": "src/**/*.md"},
+        {"categoria": "frontend", "extension": ["md", ".test.js"]},
+        {"categoria": "backend", "prefijo": "src/"},
+        {"categoria": "docs", "glob": "**/leeme*"},
+    ])
+    assert clasificar("src/a/b/notas.md") == "docs"
+    assert clasificar("otro/notas.md") == "frontend"
+    assert clasificar("src/a.test.js") == "frontend"
+    assert clasificar("src/a.js") == "backend"
+    assert clasificar("src/LEEME") == "backend"
+    assert clasificar("x/leeme.txt") == "docs"
+    assert clasificar("leeme") == "docs"
+    assert clasificar("x/y.js") == "otros"
+
+@pytest.mark.parametrize("regla", [
+    {"categoria": "scripts", "prefijo": "x/"},
+    {"categoria": "docs"},
+    {"categoria": "docs", "prefijo": "x/", "extension": ".md"},
+])
+def test_reglas_invalidas(generar_links, regla):
+    with pytest.raises(ValueError):
+        generar_links.Clasificador([regla])
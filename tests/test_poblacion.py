@@ -0,0 +1,74 @@
+"""
+generar-poblacion.py --apply contra SQLite en memoria
+"""
+
+import pytest
+
+import adaptador_bd
+
+ALUMNOS = 23
+PROFESORES = 7
+SEMILLA = 5
+
+@pytest.fixture
+def aplicar(generar_poblacion):
+    """Aplicar el shard (i, n) con un costo bcrypt mínimo; devuelve los contadores"""
+    hashed_str = generar_poblacion.hash_poblacion("Test123!", 4, SEMILLA)
+
+    def aplicar(dsn, shard=(0, 1), chunk=5):
+        tareas = generar_poblacion.planificar_chunks(ALUMNOS, PROFESORES, *shard, chunk)
+        return generar_poblacion.aplicar_poblacion(tareas, SEMILLA, hashed_str, conexiones=1,
+                                                   config=adaptador_bd.config_desde_dsn(dsn))
+    return aplicar
+
+def poblacion(dsn):
+    """Filas de la población por correo, sin ids ni fechas (dependen del orden y del momento)"""
+    conexion = adaptador_bd.conectar(adaptador_bd.config_sqlite(dsn))
+    with conexion.cursor() as cursor:
+        cursor.execute("""
+            SELECT u.correo, u.nombre, u.primer_apellido, u.segundo_apellido, u.contrasena_hash, u.rol,
+                   u.estado_cuenta, pu.nombre_completo, pe.nivel_actual, pe.idioma_aprendizaje, pe.total_xp,
+                   pp.titulo, pp.especialidad, pp.años_experiencia
+            FROM usuarios u
+            JOIN perfil_usuarios pu ON pu.usuario_id = u.id
+            LEFT JOIN perfil_estudiantes pe ON pe.usuario_id = u.id
+            LEFT JOIN perfil_profesores pp ON pp.usuario_id = u.id
+        """)
+        filas = {fila[0]: fila for fila in cursor.fetchall()}
+        cursor.execute("""
+            SELECT u.correo, c.nivel, c.idioma FROM profesor_asignaciones pa
+            JOIN usuarios u ON u.id = pa.profesor_id JOIN cursos c ON c.id = pa.curso_id
+            WHERE c.nivel = pa.nivel AND c.idioma = pa.idioma
+        """)
+        asignaciones = sorted(cursor.fetchall())
+    conexion.close()
+    return filas, asignaciones
+
+def test_shards_equivalen_a_una_sola_ejecucion(generar_poblacion, aplicar, nueva_dsn):
+    completa, por_shards = nueva_dsn(), nueva_dsn()
+    assert aplicar(completa, chunk=4) == {"insertados": ALUMNOS + PROFESORES, "existentes": 0}
+
+    indices = {"alumno": [], "profesor": []}
+    for shard in range(3):
+        tareas = generar_poblacion.planificar_chunks(ALUMNOS, PROFESORES, shard, 3, 5)
+        for rol, inicio, fin, _ in tareas:
+            indices[rol].extend(range(inicio, fin))
+        insertados = sum(fin - inicio for _, inicio, fin, _ in tareas)
+        assert aplicar(por_shards, (shard, 3)) == {"insertados": insertados, "existentes": 0}
+    # Los shards se reparten los índices sin huecos ni solapes
+    assert indices == {"alumno": list(range(ALUMNOS)), "profesor": list(range(PROFESORES))}
+
+    filas, asignaciones = poblacion(completa)
+    assert len(filas) == ALUMNOS + PROFESORES
+    assert sum(fila[5] == "profesor" for fila in filas.values()) == PROFESORES
+    assert len(asignaciones) >= PROFESORES
+    assert poblacion(por_shards) == (filas, asignaciones)
+
+def test_reaplicar_omite_los_existentes(generar_poblacion, aplicar, dsn):
+    aplicar(dsn, (1, 2))
+    antes = poblacion(dsn)
+
+    total = sum(fin - inicio for inicio, fin in (generar_poblacion.rango_shard(ALUMNOS, 1, 2),
+                                                 generar_poblacion.rango_shard(PROFESORES, 1, 2)))
+    assert aplicar(dsn, (1, 2)) == {"insertados": 0, "existentes": total}
+    assert poblacion(dsn) == antes
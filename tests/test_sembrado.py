@@ -0,0 +1,420 @@
+"""
+Siembra completa (usuarios + 296 lecciones + ejercicios) contra SQLite en memoria
+"""
+
+import io
+import json
+
+import bcrypt
+import pytest
+
+import adaptador_bd
+
+TOTAL_LECCIONES = 296
+
+def contar(bd, tabla):
+    with bd.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) AS total FROM {tabla}")
+        return cursor.fetchone()["total"]
+
+# ============================================
+# USUARIOS
+# ============================================
+def test_usuarios_con_perfiles_y_hashes_validos(crear_admin, sembrar_usuarios, bd):
+    contadores = sembrar_usuarios()
+
+    assert contadores == {"insertados": len(crear_admin.usuarios), "existentes": 0}
+    assert contar(bd, "perfil_usuarios") == len(crear_admin.usuarios)
+    assert contar(bd, "perfil_administradores") == sum(u["rol"] == "admin" for u in crear_admin.usuarios)
+    with bd.cursor() as cursor:
+        cursor.execute("SELECT correo, contrasena_hash FROM usuarios")
+        hashes = {fila["correo"]: fila["contrasena_hash"] for fila in cursor.fetchall()}
+    for user in crear_admin.usuarios:
+        assert bcrypt.checkpw(user["password"].encode("utf-8"), hashes[user["correo"]].encode("utf-8"))
+
+def test_usuarios_idempotente(crear_admin, sembrar_usuarios, bd):
+    sembrar_usuarios()
+    contadores = sembrar_usuarios()
+
+    assert contadores == {"insertados": 0, "existentes": len(crear_admin.usuarios)}
+    assert contar(bd, "usuarios") == len(crear_admin.usuarios)
+    assert contar(bd, "perfil_usuarios") == len(crear_admin.usuarios)
+
+def test_importar_rechaza_correos_duplicados(crear_admin, dsn, bd, tmp_path):
+    registros = [
+        {"nombre": "Ana", "primer_apellido": "Ruiz", "correo": "ana@x.com", "rol": "alumno", "password": "a1"},
+        {"nombre": "Ana", "primer_apellido": "Ruiz", "correo": "ana@x.com", "rol": "alumno", "password": "a2"},
+        {"nombre": "Ana", "primer_apellido": "Ruiz", "correo": "ANA@x.com", "rol": "admin", "password": "a3"},
+        {"nombre": "Beto", "primer_apellido": "Paz", "correo": "beto@x.com", "rol": "profesor", "password": "b1"},
+    ]
+    entrada = tmp_path / "usuarios.jsonl"
+    entrada.write_text("".join(json.dumps(r) + "\n" for r in registros), encoding="utf-8")
+    rechazos = tmp_path / "rechazos.jsonl"
+
+    salida = io.StringIO()
+    contadores = crear_admin.importar_usuarios(str(entrada), salida, str(rechazos), tamano_chunk=2,
+                                               multifila=True, costo=4)
+    assert contadores == {"validos": 2, "rechazados": 2}
+    assert salida.getvalue().count("'ana@x.com'") == 1
+    rechazados = [json.loads(linea) for linea in rechazos.read_text(encoding="utf-8").splitlines()]
+    assert [(r["linea"], r["error"]) for r in rechazados] == [
+        (2, "Correo duplicado: ana@x.com"), (3, "Correo duplicado: ANA@x.com")]
+
+    # --apply consume el mismo filtro: el primer registro gana
+    contadores = {"validos": 0, "rechazados": 0}
+    with open(rechazos, "w", encoding="utf-8") as archivo:
+        validos = crear_admin.usuarios_validos(crear_admin.leer_registros(str(entrada)), archivo, contadores)
+        crear_admin.aplicar_usuarios(validos, tamano_chunk=2, conexiones=1, costo=4,
+                                     config=crear_admin.config_desde_dsn(dsn))
+    assert contadores == {"validos": 2, "rechazados": 2}
+    with bd.cursor() as cursor:
+        cursor.execute("SELECT correo, rol FROM usuarios ORDER BY id")
+        assert [(f["correo"], f["rol"]) for f in cursor.fetchall()] == [("ana@x.com", "alumno"),
+                                                                        ("beto@x.com", "profesor")]
+
+def test_importar_rechaza_valores_que_no_son_texto(crear_admin, tmp_path):
+    registros = [
+        {"nombre": "Ana", "primer_apellido": "Ruiz", "correo": 42, "rol": "alumno", "password": "a1"},
+        {"nombre": "Beto", "primer_apellido": "Paz", "correo": "beto@x.com", "rol": "alumno", "password": 1234},
+        {"nombre": ["Caro"], "primer_apellido": "Gil", "correo": "caro@x.com", "rol": "admin", "password": "c1"},
+        {"nombre": "Dani", "primer_apellido": "Sol", "correo": "dani@x.com", "rol": "alumno", "password": "d1"},
+    ]
+    entrada = tmp_path / "usuarios.jsonl"
+    entrada.write_text("".join(json.dumps(r) + "\n" for r in registros), encoding="utf-8")
+    rechazos = tmp_path / "rechazos.jsonl"
+
+    contadores = crear_admin.importar_usuarios(str(entrada), io.StringIO(), str(rechazos), costo=4)
+    assert contadores == {"validos": 1, "rechazados": 3}
+    rechazados = [json.loads(linea) for linea in rechazos.read_text(encoding="utf-8").splitlines()]
+    assert [(r["linea"], r["error"]) for r in rechazados] == [
+        (1, "Campos que no son texto: correo"), (2, "Campos que no son texto: password"),
+        (3, "Campos que no son texto: nombre")]
+
+def test_aplicar_correo_existente_con_otras_mayusculas(crear_admin, dsn, bd):
+    def usuario(correo, rol="alumno"):
+        return {"nombre": "Ana", "primer_apellido": "Ruiz", "correo": correo, "rol": rol, "password": "a1"}
+
+    config = crear_admin.config_desde_dsn(dsn)
+    crear_admin.aplicar_usuarios([usuario("Ana@x.com")], conexiones=1, costo=4, config=config)
+
+    # UNIQUE(correo) no distingue mayúsculas: ana@x.com ya existe y no se vuelve a escribir
+    contadores = crear_admin.aplicar_usuarios([usuario("ana@x.com"), usuario("Beto@X.com", "admin")],
+                                              conexiones=1, costo=4, config=config)
+    assert contadores == {"insertados": 1, "existentes": 1}
+    assert contar(bd, "usuarios") == 2
+    assert contar(bd, "perfil_usuarios") == 2
+    assert contar(bd, "perfil_administradores") == 1
+
+# ============================================
+# LECCIONES Y EJERCICIOS
+# ============================================
+def test_siembra_completa_con_ejercicios(crear_lecciones, sembrar_usuarios, sembrar_lecciones, bd):
+    sembrar_usuarios()
+
+    assert sembrar_lecciones("--verify", "--ejercicios") == 0
+    assert contar(bd, "lecciones") == TOTAL_LECCIONES
+    assert contar(bd, "ejercicios") == TOTAL_LECCIONES * len(crear_lecciones.TIPOS_EJERCICIO)
+    with bd.cursor() as cursor:
+        # Cada ejercicio apunta a su lección: el título del ejercicio lleva el de la lección
+        cursor.execute("""
+            SELECT COUNT(*) AS total FROM ejercicios e JOIN lecciones l ON l.id = e.leccion_id
+            WHERE e.titulo NOT LIKE '%: ' || l.titulo
+        """)
+        assert cursor.fetchone()["total"] == 0
+        cursor.execute("SELECT DISTINCT creado_por FROM lecciones")
+        creadores = [fila["creado_por"] for fila in cursor.fetchall()]
+        cursor.execute("SELECT rol FROM usuarios WHERE id = %s", (creadores[0],))
+        assert len(creadores) == 1 and cursor.fetchone()["rol"] in ("profesor", "admin")
+        cursor.execute("SELECT contenido, respuesta_correcta FROM ejercicios WHERE tipo = 'seleccion_multiple'")
+        for fila in cursor.fetchall():
+            correcta = json.loads(fila["respuesta_correcta"])["respuestas"][0]
+            assert 0 <= correcta < len(json.loads(fila["contenido"])["preguntas"][0]["opciones"])
+
+@pytest.mark.parametrize("modo", ["fila", "infile"])
+def test_modos_fila_e_infile(sembrar_usuarios, sembrar_lecciones, bd, modo):
+    # SQLite no tiene LOAD DATA: infile debe caer al modo lote
+    sembrar_usuarios()
+
+    assert sembrar_lecciones("--modo", modo, "--verify") == 0
+    assert contar(bd, "lecciones") == TOTAL_LECCIONES
+
+class CursorLoadData:
+    """Cursor mínimo de PyMySQL: LOAD DATA devuelve `rowcount` filas y `warning_count` advertencias"""
+    def __init__(self, warning_count):
+        self.rowcount = 2
+        self.warning_count = warning_count
+        self.sentencias = []
+
+    def execute(self, sql, args=None):
+        self.sentencias.append(sql.split()[0])
+
+    def fetchall(self):
+        return [{"Level": "Warning", "Code": 1265, "Message": "Data truncated for column 'nivel' at row 1"}]
+
+def test_infile_con_advertencias_falla(crear_lecciones):
+    filas = list(crear_lecciones.generar_filas_lecciones(["Inglés"], ["A1"], 1))[:2]
+    assert crear_lecciones.cargar_lecciones_infile(CursorLoadData(0), filas) == 2
+
+    cursor = CursorLoadData(1)
+    with pytest.raises(RuntimeError, match="1 advertencias.*Data truncated"):
+        crear_lecciones.cargar_lecciones_infile(cursor, filas)
+    assert cursor.sentencias == ["LOAD", "SHOW"]
+
+def test_verificacion_detecta_cambios(sembrar_usuarios, sembrar_lecciones, bd):
+    sembrar_usuarios()
+    sembrar_lecciones()
+    assert sembrar_lecciones("--solo-verificar") == 0
+
+    with bd.cursor() as cursor:
+        cursor.execute("UPDATE lecciones SET titulo = 'Otro título' WHERE id = (SELECT MIN(id) FROM lecciones)")
+    bd.commit()
+    assert sembrar_lecciones("--solo-verificar") == 1
+
+def test_reanudar_tras_fallo(crear_lecciones, sembrar_usuarios, sembrar_lecciones, bd, monkeypatch):
+    sembrar_usuarios()
+    insertar = crear_lecciones.insertar_lecciones_lote
+    llamadas = []
+
+    def insertar_con_fallo(*args, **kwargs):
+        llamadas.append(1)
+        if len(llamadas) == 3:
+            raise RuntimeError("fallo inyectado")
+        return insertar(*args, **kwargs)
+
+    monkeypatch.setattr(crear_lecciones, "insertar_lecciones_lote", insertar_con_fallo)
+    assert sembrar_lecciones("--commit-cada", "50", "--ejercicios") == 1
+    assert contar(bd, "lecciones") == 100
+    assert contar(bd, "ejercicios") == 100 * len(crear_lecciones.TIPOS_EJERCICIO)
+
+    assert sembrar_lecciones("--resume", "--commit-cada", "50", "--ejercicios", "--verify") == 0
+    assert contar(bd, "lecciones") == TOTAL_LECCIONES
+    assert contar(bd, "ejercicios") == TOTAL_LECCIONES * len(crear_lecciones.TIPOS_EJERCICIO)
+    assert contar(bd, "checkpoints_siembra") == 0
+
+@pytest.mark.parametrize("primera, reanudacion", [(["--ejercicios"], []), ([], ["--ejercicios"])])
+def test_reanudar_exige_el_mismo_alcance(crear_lecciones, sembrar_usuarios, sembrar_lecciones, bd,
+                                         monkeypatch, primera, reanudacion):
+    sembrar_usuarios()
+    insertar = crear_lecciones.insertar_lecciones_lote
+    llamadas = []
+
+    def insertar_con_fallo(*args, **kwargs):
+        llamadas.append(1)
+        if len(llamadas) == 2:
+            raise RuntimeError("fallo inyectado")
+        return insertar(*args, **kwargs)
+
+    monkeypatch.setattr(crear_lecciones, "insertar_lecciones_lote", insertar_con_fallo)
+    assert sembrar_lecciones("--commit-cada", "50", *primera) == 1
+    monkeypatch.setattr(crear_lecciones, "insertar_lecciones_lote", insertar)
+    ejercicios = contar(bd, "ejercicios")
+
+    # Cambiar --ejercicios al reanudar se rechaza sin tocar nada
+    assert sembrar_lecciones("--resume", "--commit-cada", "50", *reanudacion) == 1
+    assert contar(bd, "lecciones") == 50
+    assert contar(bd, "ejercicios") == ejercicios
+    assert contar(bd, "checkpoints_siembra") == 1
+
+    assert sembrar_lecciones("--resume", "--commit-cada", "50", *primera, "--verify") == 0
+    assert contar(bd, "lecciones") == TOTAL_LECCIONES
+
+def test_incremental_solo_escribe_lo_modificado(crear_lecciones, sembrar_usuarios, sembrar_lecciones, bd,
+                                                monkeypatch, capsys):
+    sembrar_usuarios()
+    insertar = crear_lecciones.insertar_lecciones_lote
+    escritas = []
+
+    def insertar_registrando(cursor, filas, tamano_lote, max_paquete, total, **kwargs):
+        escritas.append((len(filas), total))
+        return insertar(cursor, filas, tamano_lote, max_paquete, total, **kwargs)
+
+    monkeypatch.setattr(crear_lecciones, "insertar_lecciones_lote", insertar_registrando)
+    assert sembrar_lecciones("--modo", "incremental") == 0
+    assert escritas == [(TOTAL_LECCIONES, TOTAL_LECCIONES)]
+
+    # Sin cambios en el catálogo no se escribe nada
+    capsys.readouterr()
+    assert sembrar_lecciones("--modo", "incremental") == 0
+    assert escritas == [(TOTAL_LECCIONES, TOTAL_LECCIONES)]
+    assert "• Inglés: 0 lecciones" in capsys.readouterr().out
+
+    with bd.cursor() as cursor:
+        cursor.execute("SELECT * FROM lecciones ORDER BY id")
+        antes = cursor.fetchall()
+    bd.commit()
+
+    # Editar la duración de la primera lección A1 y resembrar solo Inglés: una única fila cambia
+    cargar_templates = crear_lecciones.cargar_templates
+
+    def templates_editados(nivel):
+        templates = cargar_templates(nivel)
+        if nivel != "A1":
+            return templates
+        return (templates[0]._replace(duracion=templates[0].duracion + 5),) + templates[1:]
+
+    monkeypatch.setattr(crear_lecciones, "cargar_templates", templates_editados)
+    assert sembrar_lecciones("--modo", "incremental", "--idiomas", "Inglés") == 0
+    assert escritas[1:] == [(1, 1)]
+    assert "• Inglés: 1 lecciones" in capsys.readouterr().out
+
+    with bd.cursor() as cursor:
+        cursor.execute("SELECT * FROM lecciones ORDER BY id")
+        despues = cursor.fetchall()
+    distintas = [(a, d) for a, d in zip(antes, despues) if a != d]
+    assert len(despues) == TOTAL_LECCIONES
+    assert len(distintas) == 1
+    anterior, editada = distintas[0]
+    assert (editada["id"], editada["idioma"], editada["nivel"], editada["orden"]) == \
+        (anterior["id"], "Inglés", "A1", 1)
+    assert editada["duracion_minutos"] == anterior["duracion_minutos"] + 5
+    assert editada["contenido_hash"] != anterior["contenido_hash"]
+
+@pytest.mark.parametrize("opcion, valor", [("--idiomas", "Inglés,Klingon"), ("--niveles", "A1,Z9")])
+def test_idiomas_y_niveles_desconocidos(sembrar_lecciones, bd, capsys, opcion, valor):
+    assert sembrar_lecciones(opcion, valor) == 2
+    assert "desconocidos" in capsys.readouterr().err
+    assert contar(bd, "lecciones") == 0
+
+SESION_INICIAL = {"unique_checks": 1, "foreign_key_checks": 1, "bulk_insert_buffer_size": 8 * 1024 * 1024}
+
+class ConexionSesion:
+    """Conexión mínima de PyMySQL con autocommit y variables de sesión"""
+    def __init__(self, autocommit):
+        self.modo_autocommit = autocommit
+        self.sesion = dict(SESION_INICIAL)
+
+    def get_autocommit(self):
+        return self.modo_autocommit
+
+    def autocommit(self, valor):
+        self.modo_autocommit = valor
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, args=None):
+        if sql.startswith("SET SESSION"):
+            nombres = [asignacion.split("=")[0].strip() for asignacion in sql[len("SET SESSION"):].split(",")]
+            self.sesion.update(zip(nombres, args))
+
+    def fetchone(self):
+        return dict(self.sesion)
+
+@pytest.mark.parametrize("autocommit", [True, False])
+def test_sesion_masiva_restaura_autocommit(crear_lecciones, autocommit):
+    conexion = ConexionSesion(autocommit)
+    conexion.sesion_original = crear_lecciones.aplicar_sesion_masiva(conexion)
+    assert conexion.modo_autocommit is False
+    assert conexion.sesion == crear_lecciones.SESION_MASIVA
+
+    crear_lecciones.restaurar_sesion(conexion)
+    assert conexion.modo_autocommit is autocommit
+    assert conexion.sesion == SESION_INICIAL
+
+# ============================================
+# SIEMBRA EN PARALELO (XA)
+# ============================================
+class ConexionXA:
+    """Conexión falsa que anota cada sentencia como (rama, sentencia) en un registro común"""
+
+    def __init__(self, registro, rama, fallos):
+        self.registro, self.rama, self.fallos = registro, rama, fallos
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def execute(self, sql, args=None):
+        sentencia = sql.split()[1] if sql.startswith("XA ") else sql
+        if (self.rama, sentencia) in self.fallos:
+            raise RuntimeError(f"fallo inyectado en {sentencia}")
+        self.registro.append((self.rama, sentencia))
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def paralelo(crear_lecciones, monkeypatch):
+    """Ejecutar sembrar_en_paralelo con 3 ramas falsas; devuelve (registro, error)"""
+    registro = []
+
+    def sembrar(fallos=(), shard_fallido=None):
+        ramas = iter(range(3))
+        monkeypatch.setattr(crear_lecciones, "conectar_bd",
+                            lambda **_: ConexionXA(registro, next(ramas), set(fallos)))
+
+        def sembrar_shard(pool, idioma, *args):
+            conexion = pool.obtener()
+            try:
+                if idioma == shard_fallido:
+                    raise RuntimeError("shard fallido")
+                conexion.cursor().execute(f"INSERT {idioma}")
+            finally:
+                pool.liberar(conexion)
+            return 1
+
+        monkeypatch.setattr(crear_lecciones, "sembrar_shard", sembrar_shard)
+        try:
+            crear_lecciones.sembrar_en_paralelo(["a", "b", "c", "d"], ["A1"], 1, 10, 1 << 20, 3, "idioma")
+        except RuntimeError as e:
+            return registro, str(e)
+        return registro, None
+    return sembrar
+
+def sentencias(registro, rama):
+    return [sentencia for r, sentencia in registro if r == rama and not sentencia.startswith("INSERT")]
+
+def test_xa_prepara_todas_las_ramas_antes_de_confirmar(paralelo):
+    registro, error = paralelo()
+
+    assert error is None
+    assert all(sentencias(registro, rama) == ["START", "END", "PREPARE", "COMMIT"] for rama in range(3))
+    orden = [sentencia for _, sentencia in registro]
+    assert max(i for i, s in enumerate(orden) if s == "PREPARE") < orden.index("COMMIT")
+    assert sorted(s for _, s in registro if s.startswith("INSERT")) == [f"INSERT {i}" for i in "abcd"]
+
+@pytest.mark.parametrize("fallos, shard_fallido", [
+    ((), "c"),                 # Un shard falla: ninguna rama llega a PREPARE
+    ({(1, "PREPARE")}, None),  # La rama 0 ya está preparada cuando falla la 1
+])
+def test_xa_revierte_todas_las_ramas(paralelo, fallos, shard_fallido):
+    registro, error = paralelo(fallos, shard_fallido)
+
+    assert error is not None
+    assert "COMMIT" not in [sentencia for _, sentencia in registro]
+    assert all(sentencias(registro, rama)[-1] == "ROLLBACK" for rama in range(3))
+
+def test_xa_commit_fallido_deja_la_rama_preparada(paralelo):
+    registro, error = paralelo({(1, "COMMIT")})
+
+    assert "Ramas XA preparadas sin confirmar" in error and error.endswith("-1")
+    assert [sentencias(registro, rama)[-1] for rama in range(3)] == ["COMMIT", "PREPARE", "COMMIT"]
+
+# ============================================
+# ADAPTADOR
+# ============================================
+def test_lastrowid_de_insert_multifila_es_el_primero(dsn):
+    conexion = adaptador_bd.conectar(adaptador_bd.config_sqlite(dsn))
+    with conexion.cursor() as cursor:
+        cursor.execute("INSERT INTO cursos (nombre) VALUES ('a'), ('b'), ('c')")
+        assert cursor.lastrowid == 1
+        cursor.execute("INSERT INTO cursos (nombre) VALUES (%s)", ("d",))
+        assert cursor.lastrowid == 4
+    conexion.close()
+
+def test_traduccion_no_toca_literales():
+    sql = adaptador_bd.traducir_sql(
+        "INSERT INTO t (a, b) VALUES (%s, 'NOW() 100%%') ON DUPLICATE KEY UPDATE a = VALUES(a)",
+        adaptador_bd.VARIABLES_SQLITE, True)
+    assert sql == "INSERT INTO t (a, b) VALUES (?, 'NOW() 100%') ON CONFLICT DO UPDATE SET a = excluded.a"